@@ -14,10 +14,13 @@
 import requests
 import json
 import os
-import tempfile
 import sys
 import re
 import difflib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 # Set temporary directory to avoid PyTorch issues
 os.environ['TMPDIR'] = os.path.expanduser('~/tmp')
@@ -43,6 +46,151 @@ except ImportError as e:
     MarianTokenizer = None
 
 
+# Canonical metadata key -> column name in the scraped JSONL export, for every
+# field that is copied across as-is (empty string when missing).
+METADATA_FIELD_MAP = {
+    "title_arabic": "Title (Arabic)",
+    "creator_arabic": "Creator (Arabic)",
+
+    # Publication details
+    "publisher": "Publisher",
+    "location": "Location",
+    "location_governorate": "Location-Governorate (English)",
+    "location_governorate_arabic": "Location-Governorate (Arabic)",
+    "location_country": "Location-Country (English)",
+    "location_country_arabic": "Location-Country (Arabic)",
+
+    # Academic/scholarly context
+    "subject": "Subject",
+    "subject_lc": "Subject LC",
+    "language": "Language",
+    "genre": "Genre (AAT)",
+    "type": "Type",
+    "keywords_english": "Keywords (English)",
+    "keywords_arabic": "Keywords (Arabic)",
+
+    # Collection and institutional context
+    "collection": "Collection",
+    "source": "Source",
+    "medium": "Medium",
+
+    # Special fields for maps and other formats
+    "scale": "Scale",
+    "format": "Format",
+    "coverage_spatial": "Coverage-Spatial/Note",
+
+    # Rights and access
+    "rights": "Rights",
+    "access_rights": "Access Rights",
+    "license": "License",
+    "call_number": "Call number",
+    "catalogue_link": "Link to catalogue",
+
+    # Additional context
+    "notes": "Notes",
+    "image_url": "Image URL",
+}
+
+# A visual cue such as "(A shot of the book cover)". Shared by the cleaning,
+# paragraph-fixing and translation steps.
+VISUAL_CUE_RE = re.compile(r'\([^)]+\)')
+
+# Lines the LLM adds around the script (preambles, "improved version" remarks,
+# notes). Compiled once as a single alternation so the cleaner makes one pass.
+COMMENTARY_LINE_RE = re.compile(
+    r'^.*?(?:'
+    r'Here is|Here\'s|This is|I have|Generated|Script:|Translation:'
+    r'|improved|refined|corrected|enhanced'
+    r'|Note:|Comment:|Feedback:|Suggestion:'
+    r').*?\n',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Template leftovers the LLM sometimes copies from the prompt.
+PARAGRAPH_PLACEHOLDER_RE = re.compile(r'\[.*?paragraph.*?\]', re.IGNORECASE)
+CUE_PLACEHOLDER_RE = re.compile(r'\(Your visual cue here\)', re.IGNORECASE)
+
+# A visual cue on its own line; used to force a blank line before it.
+CUE_LINE_RE = re.compile(r'\n([(][^)]+[)])\n')
+
+# Characters that are not allowed in output file names.
+UNSAFE_FILENAME_RE = re.compile(r'[\\/*?:"<>|]')
+
+
+# Prefixes of commentary lines (not script content) in cleaned LLM output.
+SCRIPT_COMMENTARY_PREFIXES = ('Note:', 'Comment:', 'Feedback:', 'Suggestion:', 'Here is', 'Here\'s', 'This is')
+
+# Lower-cased markers used when trimming the refined Arabic translation.
+REFINEMENT_PREAMBLE_PREFIXES = ('here is', 'here\'s', 'this is', 'note:', 'comment:', 'improved', 'refined')
+REFINEMENT_COMMENT_PREFIXES = (
+    'note:', 'comment:', 'feedback:', 'suggestion:',
+    'here is the', 'here\'s the', 'this is the',
+)
+REFINEMENT_LABELS = frozenset({'improved', 'refined', 'corrected'})
+
+# Export columns of the basic fields, which the loader reads with fallbacks
+# and so are not in METADATA_FIELD_MAP
+BASIC_FIELD_COLUMNS = {
+    "title": "Title",
+    "creator": "Creator",
+    "date": "Date",
+    "description": "Description",
+}
+
+# Lines of the factual summary, in prompt order: (canonical key, label,
+# default). The export column comes from BASIC_FIELD_COLUMNS or
+# METADATA_FIELD_MAP. Fields whose default is None are omitted when empty.
+SUMMARY_FIELDS = (
+    # Basic identification
+    ("title", "Title", "N/A"),
+    ("title_arabic", "Arabic Title", None),
+
+    # Creator information
+    ("creator", "Creator/Author", "N/A"),
+    ("creator_arabic", "Arabic Creator", None),
+
+    # Publication details
+    ("date", "Date", "N/A"),
+    ("publisher", "Publisher", None),
+    ("location", "Location", None),
+    ("location_governorate", "Governorate", None),
+    ("location_country", "Country", None),
+
+    # Content description
+    ("description", "Description", "No description provided."),
+
+    # Academic/scholarly context
+    ("subject", "Subject", None),
+    ("subject_lc", "Subject Classification", None),
+    ("language", "Language", None),
+    ("genre", "Genre", None),
+    ("type", "Type", None),
+    ("keywords_english", "Keywords (English)", None),
+    ("keywords_arabic", "Keywords (Arabic)", None),
+
+    # Collection and institutional context
+    ("collection", "Collection", None),
+    ("source", "Source Institution", None),
+    ("medium", "Medium", None),
+
+    # Special fields for maps and other formats
+    ("scale", "Scale", None),
+    ("format", "Format", None),
+    ("coverage_spatial", "Geographic Coverage", None),
+
+    # Rights and access
+    ("rights", "Rights", None),
+    ("access_rights", "Access Rights", None),
+    ("license", "License", None),
+    ("call_number", "Call Number", None),
+    ("catalogue_link", "Catalogue Link", None),
+
+    # Additional context
+    ("notes", "Additional Notes", None),
+    ("image_url", "Image Available", None),
+)
+
+
 # For Ollama, ensure the server is running in another terminal tab
 # In your terminal, you can run:
 # ollama serve
@@ -58,10 +206,14 @@ class ScriptGenerator:
     def __init__(self, ollama_model="llama3:8b", ollama_api_url="http://localhost:11434/api/generate"):
         self.ollama_model = ollama_model
         self.ollama_api_url = ollama_api_url
+        # Reuse one keep-alive connection pool for every Ollama / API call
+        self.session = requests.Session()
         # Translation components can be kept or removed as needed
         self.translation_model_name = 'Helsinki-NLP/opus-mt-en-ar'
         self.translation_model = None
         self.translation_tokenizer = None
+        # Guards the lazy model load when several scripts are generated concurrently
+        self._translation_lock = threading.Lock()
 
         self.prompt_templates = {
             # --- ✨ NEW, MORE STRICT PROMPT ---
@@ -122,21 +274,19 @@ class ScriptGenerator:
             script = raw_script  # Keep original if no cue is found, QC will catch it
 
         # Remove markdown, placeholders, and extra whitespace.
-        script = re.sub(r'\*\*', '', script)  # Remove bold markdown
-        script = re.sub(r'\[.*?paragraph.*?\]', '', script, flags=re.IGNORECASE)
-        script = re.sub(r'\(Your visual cue here\)', '(Visual cue)', script, flags=re.IGNORECASE)
+        script = script.replace('**', '')  # Remove bold markdown
+        script = PARAGRAPH_PLACEHOLDER_RE.sub('', script)
+        script = CUE_PLACEHOLDER_RE.sub('(Visual cue)', script)
         
         # Remove common AI-generated comments and annotations
-        script = re.sub(r'^.*?(?:Here is|Here\'s|This is|I have|Generated|Script:|Translation:).*?\n', '', script, flags=re.IGNORECASE | re.MULTILINE)
-        script = re.sub(r'^.*?(?:improved|refined|corrected|enhanced).*?\n', '', script, flags=re.IGNORECASE | re.MULTILINE)
-        script = re.sub(r'^.*?(?:Note:|Comment:|Feedback:|Suggestion:).*?\n', '', script, flags=re.IGNORECASE | re.MULTILINE)
+        script = COMMENTARY_LINE_RE.sub('', script)
         
         # Remove any lines that are just commentary (not actual script content)
         lines = script.split('\n')
         cleaned_lines = []
         for line in lines:
             line = line.strip()
-            if line and not line.startswith(('Note:', 'Comment:', 'Feedback:', 'Suggestion:', 'Here is', 'Here\'s', 'This is')):
+            if line and not line.startswith(SCRIPT_COMMENTARY_PREFIXES):
                 # Check if line contains actual script content (visual cues or meaningful text)
                 if line.startswith('(') or line.startswith('[') or len(line) > 10:
                     cleaned_lines.append(line)
@@ -146,7 +296,7 @@ class ScriptGenerator:
         
         # Ensure we have proper paragraph separation for the 3-paragraph structure
         # Look for visual cues and ensure they start new paragraphs
-        script = re.sub(r'\n([(][^)]+[)])\n', r'\n\n\1\n', script)
+        script = CUE_LINE_RE.sub(r'\n\n\1\n', script)
         
         # Validate and fix the 3-paragraph structure
         script = self._ensure_three_paragraph_structure(script)
@@ -161,36 +311,34 @@ class ScriptGenerator:
         paragraphs = [p.strip() for p in script.split('\n\n') if p.strip()]
         
         # Count visual cues
-        visual_cues = re.findall(r'\([^)]+\)', script)
+        visual_cues = VISUAL_CUE_RE.findall(script)
         
-        print(f"   - Found {len(paragraphs)} paragraphs and {len(visual_cues)} visual cues")
+        logger.debug("   - Found %d paragraphs and %d visual cues", len(paragraphs), len(visual_cues))
         
         # If we have exactly 3 visual cues but wrong paragraph count, fix it
         if len(visual_cues) == 3 and len(paragraphs) != 3:
-            print(f"   - Fixing paragraph structure: {len(paragraphs)} paragraphs -> 3 paragraphs")
+            logger.debug("   - Fixing paragraph structure: %d paragraphs -> 3 paragraphs", len(paragraphs))
             # Split by visual cues to create proper paragraphs
-            parts = re.split(r'\([^)]+\)', script)
-            cues = re.findall(r'\([^)]+\)', script)
+            parts = VISUAL_CUE_RE.split(script)
             
             fixed_paragraphs = []
-            for i, cue in enumerate(cues):
+            for i, cue in enumerate(visual_cues):
                 if i < len(parts) - 1:
                     # Get the text after this cue (before the next cue)
+                    # strip() also drops any leading/trailing newlines
                     text_after_cue = parts[i + 1].strip()
-                    # Remove any leading/trailing whitespace and newlines
-                    text_after_cue = re.sub(r'^\s*\n+', '', text_after_cue)
-                    text_after_cue = re.sub(r'\n+\s*$', '', text_after_cue)
                     
                     paragraph = cue + '\n' + text_after_cue
                     fixed_paragraphs.append(paragraph)
             
             if len(fixed_paragraphs) == 3:
-                script = '\n\n'.join(fixed_paragraphs)
-                print(f"   - Successfully fixed to 3 paragraphs")
+                logger.debug("   - Successfully fixed to 3 paragraphs")
+                # Already in shape; skip the forced rebuild below
+                return '\n\n'.join(fixed_paragraphs)
         
         # If we still don't have 3 paragraphs, try to force the structure
         if len(paragraphs) != 3:
-            print(f"   - Warning: Script does not have exactly 3 paragraphs. Attempting to fix...")
+            logger.warning("   - Script does not have exactly 3 paragraphs. Attempting to fix...")
             # Try to identify the three main sections and force the structure
             if len(visual_cues) >= 3:
                 # Use the first 3 visual cues to create the structure
@@ -203,16 +351,14 @@ class ScriptGenerator:
         Forces the script into a 3-paragraph structure using the provided visual cues.
         """
         # Split the script by the visual cues
-        parts = re.split(r'\([^)]+\)', script)
+        parts = VISUAL_CUE_RE.split(script)
         
         # Create the three paragraphs
         paragraphs = []
         for i, cue in enumerate(cues):
             if i < len(parts) - 1:
+                # strip() also drops any leading/trailing newlines
                 text_content = parts[i + 1].strip()
-                # Clean up the text content
-                text_content = re.sub(r'^\s*\n+', '', text_content)
-                text_content = re.sub(r'\n+\s*$', '', text_content)
                 
                 paragraph = cue + '\n' + text_content
                 paragraphs.append(paragraph)
@@ -225,19 +371,19 @@ class ScriptGenerator:
         --- Pre-flight Check 1 ---
         Checks if the Ollama server is running and accessible.
         """
-        print("--- Pre-flight Check: Verifying Ollama Connection ---")
+        logger.info("--- Pre-flight Check: Verifying Ollama Connection ---")
         try:
             base_url = self.ollama_api_url.replace("/api/generate", "")
-            response = requests.get(base_url, timeout=5)
+            response = self.session.get(base_url, timeout=5)
             response.raise_for_status()
-            print(f"   - Success: Ollama server is responsive at {base_url}.")
+            logger.info("   - Success: Ollama server is responsive at %s.", base_url)
             return True
         except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-            print("   - [FATAL] Could not connect to Ollama.")
-            print("   - ACTION: Please ensure the Ollama application is running on your machine.")
+            logger.critical("   - Could not connect to Ollama.")
+            logger.error("   - ACTION: Please ensure the Ollama application is running on your machine.")
             return False
         except requests.exceptions.RequestException as e:
-            print(f"   - [FATAL] An unexpected error occurred while checking Ollama status: {e}")
+            logger.critical("   - An unexpected error occurred while checking Ollama status: %s", e)
             return False
 
     def _check_available_models(self):
@@ -245,176 +391,106 @@ class ScriptGenerator:
         --- Pre-flight Check 2 ---
         Checks if the required Ollama model is available locally.
         """
-        print("--- Pre-flight Check: Verifying Ollama Models ---")
+        logger.info("--- Pre-flight Check: Verifying Ollama Models ---")
         try:
             tags_url = self.ollama_api_url.replace("/api/generate", "/api/tags")
-            response = requests.get(tags_url, timeout=10)
+            response = self.session.get(tags_url, timeout=10)
             response.raise_for_status()
             models_data = response.json()
             
             available_models = [model['name'] for model in models_data.get('models', [])]
             
             if not available_models:
-                print(f"   - [FATAL] No models found in your local Ollama instance.")
-                print(f"   - ACTION: Please pull a model by running 'ollama pull {self.ollama_model}' in your terminal.")
+                logger.critical("   - No models found in your local Ollama instance.")
+                logger.error("   - ACTION: Please pull a model by running 'ollama pull %s' in your terminal.", self.ollama_model)
                 return False
 
-            print(f"   - Available models: {', '.join(available_models)}")
+            logger.info("   - Available models: %s", ', '.join(available_models))
 
             if self.ollama_model in available_models:
-                print(f"   - Success: Required model '{self.ollama_model}' is available.")
+                logger.info("   - Success: Required model '%s' is available.", self.ollama_model)
                 return True
             else:
                 # Let's try to find a similar model if the exact one is not found
                 base_model_name = self.ollama_model.split(':')[0]
                 similar_models = [m for m in available_models if m.startswith(base_model_name)]
                 if similar_models:
-                    print(f"   - [WARNING] Required model '{self.ollama_model}' not found. Using '{similar_models[0]}' instead.")
+                    logger.warning("   - Required model '%s' not found. Using '%s' instead.", self.ollama_model, similar_models[0])
                     self.ollama_model = similar_models[0]
                     return True
                 else:
-                    print(f"   - [FATAL] Required model '{self.ollama_model}' is not available locally.")
-                    print(f"   - ACTION: Please run 'ollama pull {self.ollama_model}' in your terminal.")
+                    logger.critical("   - Required model '%s' is not available locally.", self.ollama_model)
+                    logger.error("   - ACTION: Please run 'ollama pull %s' in your terminal.", self.ollama_model)
                     return False
 
         except requests.exceptions.RequestException as e:
-            print(f"   - [FATAL] Could not get model list from Ollama: {e}")
+            logger.critical("   - Could not get model list from Ollama: %s", e)
             return False
 
     def _get_metadata_from_json(self, file_path, row_indices):
-        print(f"\n1. Parsing metadata from '{file_path}' for rows: {row_indices}...")
+        logger.info("1. Parsing metadata from '%s' for rows: %s...", file_path, row_indices)
         metadata_list = []
         try:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"The file was not found at the specified path: {file_path}")
+            # Stream the file and keep only the requested rows instead of
+            # loading the whole (multi-MB) JSONL export into memory.
+            wanted = set(row_indices)
+            lines = {}
             with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+                for line_number, line in enumerate(f):
+                    if line_number in wanted:
+                        lines[line_number] = line
+                        if len(lines) == len(wanted):
+                            break
             for index in row_indices:
-                if not (0 <= index < len(lines)):
-                    print(f"   - [WARNING] Row index {index} is out of bounds. Skipping.")
+                if index not in lines:
+                    logger.warning("   - Row index %d is out of bounds. Skipping.", index)
                     continue
                 try:
                     item = json.loads(lines[index])
                     metadata = {
-                        # Basic identification
+                        # Basic identification (fields with fallbacks / defaults)
                         "identifier": item.get('Call number', item.get('identi', f'Row_{index}')),
                         "title": item.get('Title', item.get('Title (English)', 'No Title Available')),
-                        "title_arabic": item.get('Title (Arabic)', ''),
                         "creator": item.get('Creator', 'Unknown Author'),
-                        "creator_arabic": item.get('Creator (Arabic)', ''),
                         "date": str(item.get('Date', 'No Date Available')),
                         "description": item.get('Description', item.get('Description (English)', 'No description provided.')),
-                        
-                        # Publication details
-                        "publisher": item.get('Publisher', ''),
-                        "location": item.get('Location', ''),
-                        "location_governorate": item.get('Location-Governorate (English)', ''),
-                        "location_governorate_arabic": item.get('Location-Governorate (Arabic)', ''),
-                        "location_country": item.get('Location-Country (English)', ''),
-                        "location_country_arabic": item.get('Location-Country (Arabic)', ''),
-                        
-                        # Academic/scholarly context
-                        "subject": item.get('Subject', ''),
-                        "subject_lc": item.get('Subject LC', ''),
-                        "language": item.get('Language', ''),
-                        "genre": item.get('Genre (AAT)', ''),
-                        "type": item.get('Type', ''),
-                        "keywords_english": item.get('Keywords (English)', ''),
-                        "keywords_arabic": item.get('Keywords (Arabic)', ''),
-                        
-                        # Collection and institutional context
-                        "collection": item.get('Collection', ''),
-                        "source": item.get('Source', ''),
-                        "medium": item.get('Medium', ''),
-                        
-                        # Special fields for maps and other formats
-                        "scale": item.get('Scale', ''),
-                        "format": item.get('Format', ''),
-                        "coverage_spatial": item.get('Coverage-Spatial/Note', ''),
-                        
-                        # Rights and access
-                        "rights": item.get('Rights', ''),
-                        "access_rights": item.get('Access Rights', ''),
-                        "license": item.get('License', ''),
-                        "call_number": item.get('Call number', ''),
-                        "catalogue_link": item.get('Link to catalogue', ''),
-                        
-                        # Additional context
-                        "notes": item.get('Notes', ''),
-                        "image_url": item.get('Image URL', ''),
-                        
-                        # Preserve all original fields for comprehensive access
-                        "raw_data": item
                     }
-                    print(f"   - Successfully parsed comprehensive metadata for: {metadata['title']}")
+                    # All remaining fields map one-to-one onto an export column
+                    for key, column in METADATA_FIELD_MAP.items():
+                        metadata[key] = item.get(column, '')
+                    # Preserve all original fields for comprehensive access
+                    metadata["raw_data"] = item
+                    logger.info("   - Successfully parsed comprehensive metadata for: %s", metadata['title'])
                     metadata_list.append(metadata)
                 except json.JSONDecodeError:
-                    print(f"   - [ERROR] Could not decode JSON from row {index}. Skipping.")
+                    logger.error("   - Could not decode JSON from row %d. Skipping.", index)
             return metadata_list
         except Exception as e:
-            print(f"   - [ERROR] An unexpected error occurred while reading the JSON file: {e}")
+            logger.error("   - An unexpected error occurred while reading the JSON file: %s", e)
             return []
 
     def _get_default_metadata(self, reason="No data source provided."):
         """Returns a default metadata object when real data can't be fetched."""
-        print(f"   - [WARNING] Could not fetch metadata: {reason}")
-        return {
+        logger.warning("   - Could not fetch metadata: %s", reason)
+        metadata = {
             # Basic identification
             "identifier": "N/A", 
             "title": "No Title", 
-            "title_arabic": "",
             "creator": "Unknown",
-            "creator_arabic": "",
             "date": "Unknown", 
             "description": "No description available.",
-            
-            # Publication details
-            "publisher": "",
-            "location": "",
-            "location_governorate": "",
-            "location_governorate_arabic": "",
-            "location_country": "",
-            "location_country_arabic": "",
-            
-            # Academic/scholarly context
-            "subject": "",
-            "subject_lc": "",
-            "language": "",
-            "genre": "",
-            "type": "",
-            "keywords_english": "",
-            "keywords_arabic": "",
-            
-            # Collection and institutional context
-            "collection": "",
-            "source": "",
-            "medium": "",
-            
-            # Special fields
-            "scale": "",
-            "format": "",
-            "coverage_spatial": "",
-            
-            # Rights and access
-            "rights": "",
-            "access_rights": "",
-            "license": "",
-            "call_number": "",
-            "catalogue_link": "",
-            
-            # Additional context
-            "notes": "",
-            "image_url": "",
-            
-            # Raw data
-            "raw_data": {}
         }
+        metadata.update(dict.fromkeys(METADATA_FIELD_MAP, ""))
+        metadata["raw_data"] = {}
+        return metadata
 
     def _send_prompt_to_ollama(self, prompt, timeout=60):
         """Generic function to send any prompt to the Ollama API."""
         payload = {"model": self.ollama_model, "prompt": prompt, "stream": False}
         try:
-            response = requests.post(self.ollama_api_url, json=payload, timeout=timeout)
+            response = self.session.post(self.ollama_api_url, json=payload, timeout=timeout)
             response.raise_for_status()
             response_data = response.json()
             return response_data.get('response', 'Error: Could not parse response from Ollama.')
@@ -431,17 +507,17 @@ class ScriptGenerator:
         Fetches book info from the Google Books API and intelligently selects
         the best match instead of just the first result.
         """
-        print("   - Step B: Querying Google Books API for verified facts...")
+        logger.info("   - Step B: Querying Google Books API for verified facts...")
         query = f"intitle:{metadata['title']}+inauthor:{metadata['creator']}"
         api_url = f"https://www.googleapis.com/books/v1/volumes?q={query}&key={api_key}"
 
         try:
-            response = requests.get(api_url, timeout=10)
+            response = self.session.get(api_url, timeout=10)
             response.raise_for_status()
             data = response.json()
 
             if "items" not in data or not data["items"]:
-                print("     - API Warning: No books found matching the query.")
+                logger.warning("     - Google Books API: No books found matching the query.")
                 return None
 
             # --- INTELLIGENT MATCHING LOGIC ---
@@ -467,7 +543,7 @@ class ScriptGenerator:
 
             if best_match_item and highest_score >= SIMILARITY_THRESHOLD:
                 book_info = best_match_item["volumeInfo"]
-                print(f"     - Success: Found best match '{book_info.get('title')}' with score {highest_score:.2f}")
+                logger.info("     - Success: Found best match '%s' with score %.2f", book_info.get('title'), highest_score)
 
                 facts = {
                     "api_title": book_info.get("title", "N/A"),
@@ -480,11 +556,11 @@ class ScriptGenerator:
                 }
                 return facts
             else:
-                print(f"     - API Warning: No close match found. Best score was {highest_score:.2f}.")
+                logger.warning("     - Google Books API: No close match found. Best score was %.2f.", highest_score)
                 return None
 
         except requests.exceptions.RequestException as e:
-            print(f"     - API Error: Could not connect to Google Books API. {e}")
+            logger.error("     - Could not connect to Google Books API. %s", e)
             return None
 
     def _generate_factual_summary(self, metadata: dict) -> str:
@@ -492,128 +568,27 @@ class ScriptGenerator:
         Creates a comprehensive factual summary from all available metadata fields.
         This method utilizes the rich metadata to provide detailed context.
         """
-        print("2. Generating Enhanced Factual Summary (from all metadata fields)...")
+        logger.info("2. Generating Enhanced Factual Summary (from all metadata fields)...")
         
         # Build comprehensive summary using all available fields
         summary_parts = []
-        
-        # Basic identification
-        title = metadata.get('title', metadata.get('Title', 'N/A'))
-        title_arabic = metadata.get('title_arabic', metadata.get('Title (Arabic)', ''))
-        summary_parts.append(f"Title: {title}")
-        if title_arabic:
-            summary_parts.append(f"Arabic Title: {title_arabic}")
-        
-        # Creator information
-        creator = metadata.get('creator', metadata.get('Creator', 'N/A'))
-        creator_arabic = metadata.get('creator_arabic', metadata.get('Creator (Arabic)', ''))
-        summary_parts.append(f"Creator/Author: {creator}")
-        if creator_arabic:
-            summary_parts.append(f"Arabic Creator: {creator_arabic}")
-        
-        # Publication details
-        date = metadata.get('date', metadata.get('Date', 'N/A'))
-        publisher = metadata.get('publisher', metadata.get('Publisher', ''))
-        location = metadata.get('location', metadata.get('Location', ''))
-        location_governorate = metadata.get('location_governorate', metadata.get('Location-Governorate (English)', ''))
-        location_country = metadata.get('location_country', metadata.get('Location-Country (English)', ''))
-        
-        summary_parts.append(f"Date: {date}")
-        if publisher:
-            summary_parts.append(f"Publisher: {publisher}")
-        if location:
-            summary_parts.append(f"Location: {location}")
-        if location_governorate:
-            summary_parts.append(f"Governorate: {location_governorate}")
-        if location_country:
-            summary_parts.append(f"Country: {location_country}")
-        
-        # Content description
-        description = metadata.get('description', metadata.get('Description', 'No description provided.'))
-        summary_parts.append(f"Description: {description}")
-        
-        # Academic/scholarly context
-        subject = metadata.get('subject', metadata.get('Subject', ''))
-        subject_lc = metadata.get('subject_lc', metadata.get('Subject LC', ''))
-        language = metadata.get('language', metadata.get('Language', ''))
-        genre = metadata.get('genre', metadata.get('Genre (AAT)', ''))
-        type_info = metadata.get('type', metadata.get('Type', ''))
-        keywords_english = metadata.get('keywords_english', metadata.get('Keywords (English)', ''))
-        keywords_arabic = metadata.get('keywords_arabic', metadata.get('Keywords (Arabic)', ''))
-        
-        if subject:
-            summary_parts.append(f"Subject: {subject}")
-        if subject_lc:
-            summary_parts.append(f"Subject Classification: {subject_lc}")
-        if language:
-            summary_parts.append(f"Language: {language}")
-        if genre:
-            summary_parts.append(f"Genre: {genre}")
-        if type_info:
-            summary_parts.append(f"Type: {type_info}")
-        if keywords_english:
-            summary_parts.append(f"Keywords (English): {keywords_english}")
-        if keywords_arabic:
-            summary_parts.append(f"Keywords (Arabic): {keywords_arabic}")
-        
-        # Collection and institutional context
-        collection = metadata.get('collection', metadata.get('Collection', ''))
-        source = metadata.get('source', metadata.get('Source', ''))
-        medium = metadata.get('medium', metadata.get('Medium', ''))
-        
-        if collection:
-            summary_parts.append(f"Collection: {collection}")
-        if source:
-            summary_parts.append(f"Source Institution: {source}")
-        if medium:
-            summary_parts.append(f"Medium: {medium}")
-        
-        # Special fields for maps and other formats
-        scale = metadata.get('scale', metadata.get('Scale', ''))
-        format_type = metadata.get('format', metadata.get('Format', ''))
-        coverage = metadata.get('coverage_spatial', metadata.get('Coverage-Spatial/Note', ''))
-        
-        if scale:
-            summary_parts.append(f"Scale: {scale}")
-        if format_type:
-            summary_parts.append(f"Format: {format_type}")
-        if coverage:
-            summary_parts.append(f"Geographic Coverage: {coverage}")
-        
-        # Rights and access
-        rights = metadata.get('rights', metadata.get('Rights', ''))
-        access_rights = metadata.get('access_rights', metadata.get('Access Rights', ''))
-        license_info = metadata.get('license', metadata.get('License', ''))
-        call_number = metadata.get('call_number', metadata.get('Call number', ''))
-        catalogue_link = metadata.get('catalogue_link', metadata.get('Link to catalogue', ''))
-        
-        if rights:
-            summary_parts.append(f"Rights: {rights}")
-        if access_rights:
-            summary_parts.append(f"Access Rights: {access_rights}")
-        if license_info:
-            summary_parts.append(f"License: {license_info}")
-        if call_number:
-            summary_parts.append(f"Call Number: {call_number}")
-        if catalogue_link:
-            summary_parts.append(f"Catalogue Link: {catalogue_link}")
-        
-        # Additional context
-        notes = metadata.get('notes', metadata.get('Notes', ''))
-        image_url = metadata.get('image_url', metadata.get('Image URL', ''))
-        
-        if notes:
-            summary_parts.append(f"Additional Notes: {notes}")
-        if image_url:
-            summary_parts.append(f"Image Available: {image_url}")
+        for key, label, default in SUMMARY_FIELDS:
+            if key in metadata:
+                value = metadata[key]
+            else:
+                column = BASIC_FIELD_COLUMNS.get(key) or METADATA_FIELD_MAP[key]
+                value = metadata.get(column, default)
+            # Fields with a default are always listed; the rest only when present
+            if value or default is not None:
+                summary_parts.append(f"{label}: {value}")
         
         summary = "\n".join(summary_parts)
-        print(f"   - Enhanced factual summary created with {len(summary_parts)} metadata fields.")
+        logger.info("   - Enhanced factual summary created with %d metadata fields.", len(summary_parts))
         return summary
 
     def _create_prompt(self, metadata, artifact_type="publication_deep_dive", factual_summary=None):
         """Creates the final prompt, injecting the factual summary if available."""
-        print("3. Creating final script prompt...")
+        logger.info("3. Creating final script prompt...")
         template = self.prompt_templates.get(artifact_type)
         if not template:
             return f"Generate a script for {metadata['title']}"
@@ -627,7 +602,7 @@ class ScriptGenerator:
         else:
             prompt = template.format(**metadata)
             
-        print(f"   - Using template for artifact type: '{artifact_type}'")
+        logger.info("   - Using template for artifact type: '%s'", artifact_type)
         return prompt
 
     def _quality_check(self, script_text: str):
@@ -646,7 +621,7 @@ class ScriptGenerator:
     
     def refine_translation_with_ollama(self, arabic_text):
         """Takes a machine-translated Arabic script and uses an LLM to refine it."""
-        print("\n7. Refining translation with Ollama LLM...")
+        logger.info("7. Refining translation with Ollama LLM...")
         refinement_prompt = (
             "You are an expert Arabic language editor. Your ONLY job is to fix awkward wording and grammar errors in the Arabic text below. "
             "CRITICAL RULES:\n"
@@ -679,8 +654,8 @@ class ScriptGenerator:
             line_stripped = line.strip()
             # Skip lines that are just commentary or explanations
             if (line_stripped.startswith('(') or 
-                any(ord(char) > 127 for char in line_stripped) or
-                (len(line_stripped) > 10 and not line_stripped.lower().startswith(('here is', 'here\'s', 'this is', 'note:', 'comment:', 'improved', 'refined')))):
+                not line_stripped.isascii() or
+                (len(line_stripped) > 10 and not line_stripped.lower().startswith(REFINEMENT_PREAMBLE_PREFIXES))):
                 start_index = i
                 break
         
@@ -691,49 +666,49 @@ class ScriptGenerator:
         cleaned_lines = []
         for line in final_lines:
             line_stripped = line.strip()
+            line_lower = line_stripped.lower()
             # Only remove lines that are clearly commentary, not actual content
             if (line_stripped and 
-                not line_stripped.lower().startswith(('note:', 'comment:', 'feedback:', 'suggestion:')) and
-                not line_stripped.lower().startswith(('here is the', 'here\'s the', 'this is the')) and
-                not (len(line_stripped) < 5 and line_stripped.lower() in ['improved', 'refined', 'corrected'])):
+                not line_lower.startswith(REFINEMENT_COMMENT_PREFIXES) and
+                not (len(line_stripped) < 5 and line_lower in REFINEMENT_LABELS)):
                 cleaned_lines.append(line)
         
         final_text = '\n\n'.join(cleaned_lines).strip()
         
         # Ensure proper paragraph separation for the 3-paragraph structure
         # Look for visual cues and ensure they start new paragraphs
-        final_text = re.sub(r'\n([(][^)]+[)])\n', r'\n\n\1\n', final_text)
+        final_text = CUE_LINE_RE.sub(r'\n\n\1\n', final_text)
         
-        print("   - Refinement with Ollama successful.")
+        logger.info("   - Refinement with Ollama successful.")
         return final_text
 
     def translate_to_arabic(self, script_text):
         """Translates the given English text to Arabic paragraph by paragraph, preserving visual cues."""
-        print("\n6. Translating to Arabic...")
+        logger.info("6. Translating to Arabic...")
         try:
-            if self.translation_model is None or self.translation_tokenizer is None:
-                print("   - Loading translation model for the first time... (This may take a moment)")
-                self.translation_tokenizer = MarianTokenizer.from_pretrained(self.translation_model_name)
-                self.translation_model = MarianMTModel.from_pretrained(self.translation_model_name)
-                print("   - Translation model loaded.")
+            with self._translation_lock:
+                if self.translation_model is None or self.translation_tokenizer is None:
+                    logger.info("   - Loading translation model for the first time... (This may take a moment)")
+                    self.translation_tokenizer = MarianTokenizer.from_pretrained(self.translation_model_name)
+                    self.translation_model = MarianMTModel.from_pretrained(self.translation_model_name)
+                    logger.info("   - Translation model loaded.")
 
             # Split by double newlines to preserve paragraph structure
             paragraphs = script_text.strip().split('\n\n')
             translated_paragraphs = []
-            print(f"   - Translating {len(paragraphs)} paragraph(s)...")
+            logger.info("   - Translating %d paragraph(s)...", len(paragraphs))
             
             # Ensure we have exactly 3 paragraphs for the standard format
             if len(paragraphs) < 3:
-                print(f"   - Warning: Found {len(paragraphs)} paragraphs, expected 3. Attempting to fix structure...")
+                logger.warning("   - Found %d paragraphs, expected 3. Attempting to fix structure...", len(paragraphs))
                 # Try to split by visual cues if paragraphs are not properly separated
                 if len(paragraphs) == 1:
                     # Split the single paragraph by visual cues
                     content = paragraphs[0]
-                    visual_cue_pattern = r'\([^)]+\)'
-                    cues = re.findall(visual_cue_pattern, content)
+                    cues = VISUAL_CUE_RE.findall(content)
                     if len(cues) >= 3:
                         # Split by visual cues to create proper paragraphs
-                        parts = re.split(visual_cue_pattern, content)
+                        parts = VISUAL_CUE_RE.split(content)
                         paragraphs = []
                         for i, cue in enumerate(cues):
                             if i < len(parts) - 1:
@@ -744,7 +719,7 @@ class ScriptGenerator:
                 if not p.strip():
                     continue
                 
-                print(f"     - Translating paragraph {i+1}...")
+                logger.debug("     - Translating paragraph %d...", i + 1)
                 
                 # Check if paragraph starts with visual cue
                 visual_cue = ""
@@ -784,7 +759,7 @@ class ScriptGenerator:
                     translated_paragraphs.append(translated_p)
             
             full_translation = "\n\n".join(translated_paragraphs)
-            print("   - Translation successful.")
+            logger.info("   - Translation successful.")
             return full_translation
         except Exception as e:
             return f"[ERROR] Could not perform translation due to an unexpected error: {e}"
@@ -792,31 +767,31 @@ class ScriptGenerator:
     def run_pipeline(self, source_path, artifact_type="publication_deep_dive", row_indices=None):
         if row_indices is None:
             row_indices = [0]
-        print("--- Starting Script Generation Pipeline ---\n")
+        logger.info("--- Starting Script Generation Pipeline ---")
 
         if not self._check_ollama_status() or not self._check_available_models():
-            print("\n--- Pipeline Halted due to pre-flight check failure. ---")
+            logger.error("--- Pipeline Halted due to pre-flight check failure. ---")
             return
 
         all_metadata = self._get_metadata_from_json(source_path, row_indices)
         if not all_metadata:
-            print("\n--- Pipeline Halted: Could not retrieve any valid metadata. ---")
+            logger.error("--- Pipeline Halted: Could not retrieve any valid metadata. ---")
             return
         
         output_dir = "results"
         os.makedirs(output_dir, exist_ok=True)
 
         for i, metadata in enumerate(all_metadata):
-            print(f"\n\n{'='*20} Processing Object {i+1}/{len(all_metadata)}: '{metadata.get('title', 'N/A')}' {'='*20}")
+            logger.info("%s Processing Object %d/%d: '%s' %s", '=' * 20, i + 1, len(all_metadata), metadata.get('title', 'N/A'), '=' * 20)
 
             factual_summary = None
             if artifact_type == "publication_deep_dive":
-                print("2. Generating Factual Summary (for improved accuracy)...")
+                logger.info("2. Generating Factual Summary (for improved accuracy)...")
                 factual_summary = self._generate_factual_summary(metadata)
 
             prompt = self._create_prompt(metadata, artifact_type, factual_summary)
 
-            print("4. Generating final creative script...")
+            logger.info("4. Generating final creative script...")
             raw_script = self._send_prompt_to_ollama(prompt)
 
             # --- NEW & IMPROVED SCRIPT CLEANING ---
@@ -831,22 +806,22 @@ class ScriptGenerator:
                 script = raw_script
 
             # Continue with the rest of the cleaning
-            script = re.sub(r'\[.*?paragraph.*?\]', '', script, flags=re.IGNORECASE).strip()
-            script = re.sub(r'\(Your visual cue here\)', '(Visual cue)', script, flags=re.IGNORECASE).strip()
+            script = PARAGRAPH_PLACEHOLDER_RE.sub('', script).strip()
+            script = CUE_PLACEHOLDER_RE.sub('(Visual cue)', script).strip()
 
-            print("   - Script received and robustly cleaned.")
+            logger.info("   - Script received and robustly cleaned.")
 
-            print("\n5. Performing quality control...")
+            logger.info("5. Performing quality control...")
             is_passed, qc_message = self._quality_check(script)
-            print(f"   - {qc_message}")
+            logger.info("   - %s", qc_message)
             
-            safe_title = re.sub(r'[\\/*?:"<>|]', "", metadata['title'])[:50].strip()
+            safe_title = UNSAFE_FILENAME_RE.sub("", metadata['title'])[:50].strip()
 
             if is_passed:
                 en_filename = os.path.join(output_dir, f"{safe_title}_en.txt")
                 with open(en_filename, 'w', encoding='utf-8') as f:
                     f.write(script)
-                print(f"\n✅ English script saved to: {en_filename}")
+                logger.info("✅ English script saved to: %s", en_filename)
                 
                 translated_script = self.translate_to_arabic(script)
                 refined_script = self.refine_translation_with_ollama(translated_script)
@@ -854,11 +829,11 @@ class ScriptGenerator:
                 ar_filename = os.path.join(output_dir, f"{safe_title}_ar.txt")
                 with open(ar_filename, 'w', encoding='utf-8') as f:
                     f.write(refined_script)
-                print(f"✅ Refined Arabic script saved to: {ar_filename}")
+                logger.info("✅ Refined Arabic script saved to: %s", ar_filename)
             else:
-                print("\nSkipping translation and saving due to QC failure.")
+                logger.warning("Skipping translation and saving due to QC failure.")
 
-        print("\n\n--- All selected objects processed. Pipeline Finished ---")
+        logger.info("--- All selected objects processed. Pipeline Finished ---")
 
 
 if __name__ == "__main__":
@@ -871,6 +846,13 @@ if __name__ == "__main__":
     
     OLLAMA_MODEL = "llama3:8b"
 
+    # Pipeline progress is reported through logging; set LOG_LEVEL=DEBUG for per-paragraph detail.
+    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
+    if not isinstance(logging.getLevelName(log_level), int):
+        print(f"Unknown LOG_LEVEL '{log_level}', using INFO.")
+        log_level = "INFO"
+    logging.basicConfig(level=log_level, format="%(levelname)-8s %(message)s")
+
     # --- User Input for Object Selection ---
     print(f"Metadata file being used: {JSON_FILE_PATH}")
     print("You can process up to 3 objects at a time.")
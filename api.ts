@@ -137,6 +137,7 @@ interface AudioGenerationRequest {
   script: string;
   voice_id?: string;
   output_filename?: string;
+  inline?: boolean;  // Include base64 audio_data (default true)
 }
 
 /**
@@ -144,7 +145,9 @@ interface AudioGenerationRequest {
  */
 interface AudioGenerationResponse {
   success: boolean;
-  audio_data?: string;  // Base64 encoded audio data
+  audio_data?: string;  // Base64 encoded audio data (omitted when inline is false)
+  audio_url?: string;   // Path of the saved WAV, e.g. /tts/download/<filename>
+  filename?: string;
   audio_bytes?: number; // Size in bytes
   duration_seconds?: number;
   voice_used?: string;
@@ -4,7 +4,7 @@ import React, { useState, useEffect } from "react";
 import { 
   generateAudio, 
   getTTSVoices, 
-  saveAudioToFile,
+  downloadAudio,
   type TTSVoice,
   type AudioGenerationResponse 
 } from "../../api";
@@ -33,8 +33,15 @@ export default function GenerateAudio({ script, onAudioGenerated }: GenerateAudi
         if (parsed.script === script && parsed.audioInfo) {
           setAudioInfo(parsed.audioInfo);
           
-          // Recreate audio URL from saved base64 data
-          if (parsed.audioInfo.audio_data) {
+          // Recreate audio URL from the server file (or base64 data saved by older versions)
+          if (parsed.audioInfo.filename) {
+            downloadAudio(parsed.audioInfo.filename)
+              .then(audioBlob => setAudioUrl(URL.createObjectURL(audioBlob)))
+              .catch(error => {
+                console.error('Error loading saved audio file:', error);
+                localStorage.removeItem('generatedAudioData');
+              });
+          } else if (parsed.audioInfo.audio_data) {
             const audioBlob = new Blob([
               Uint8Array.from(atob(parsed.audioInfo.audio_data), c => c.charCodeAt(0))
             ], { type: parsed.audioInfo.mime_type || 'audio/wav' });
@@ -98,19 +105,18 @@ export default function GenerateAudio({ script, onAudioGenerated }: GenerateAudi
     setMessage("");
 
     try {
+      // Fetch the WAV as a file instead of base64 inside the JSON response
       const audioData: AudioGenerationResponse = await generateAudio({
         script: script,
-        voice_id: selectedVoice
+        voice_id: selectedVoice,
+        inline: false
       });
 
-      if (audioData.success && audioData.audio_data) {
+      if (audioData.success && audioData.filename) {
         setAudioInfo(audioData);
         
-        // Create audio URL from base64 data for immediate playback
-        const audioBlob = new Blob([
-          Uint8Array.from(atob(audioData.audio_data), c => c.charCodeAt(0))
-        ], { type: audioData.mime_type || 'audio/wav' });
-        
+        // Create audio URL from the saved file for immediate playback
+        const audioBlob = await downloadAudio(audioData.filename);
         const url = URL.createObjectURL(audioBlob);
         setAudioUrl(url);
         
@@ -137,34 +143,20 @@ export default function GenerateAudio({ script, onAudioGenerated }: GenerateAudi
   };
 
   const handleDownload = async () => {
-    if (!audioInfo?.audio_data) return;
+    if (!audioUrl) return;
 
     try {
-      // Save audio to temporary file first
+      // The audio is already in the browser; download it under a timestamped name
       const timestamp = new Date().toISOString().replace(/[:.]/g, '-');
       const filename = `script_audio_${timestamp}.wav`;
       
-      const saveResult = await saveAudioToFile(audioInfo.audio_data, filename);
-      
-      if (saveResult.success) {
-        // Create download link from the saved file
-        const response = await fetch(`/api/tts/download/${saveResult.filename}`);
-        const audioBlob = await response.blob();
-        const url = URL.createObjectURL(audioBlob);
-        
-        // Create download link
-        const a = document.createElement('a');
-        a.href = url;
-        a.download = filename;
-        document.body.appendChild(a);
-        a.click();
-        document.body.removeChild(a);
-        
-        // Clean up URL
-        URL.revokeObjectURL(url);
-      } else {
-        setMessage("Failed to save audio file for download");
-      }
+      // Create download link
+      const a = document.createElement('a');
+      a.href = audioUrl;
+      a.download = filename;
+      document.body.appendChild(a);
+      a.click();
+      document.body.removeChild(a);
     } catch (error) {
       setMessage(`Download failed: ${error instanceof Error ? error.message : 'Unknown error'}`);
     }
@@ -1,9 +1,11 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional
 import uvicorn
+import asyncio
 import json
 import re
 import os
@@ -28,6 +30,7 @@ MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION", "Digital Collection")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
 BACKEND_HOST = os.getenv("BACKEND_HOST", "127.0.0.1")
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8002"))
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", "2")))  # 0 would block every batch item
 
 # Validate required environment variables
 if not MONGODB_USERNAME or not MONGODB_PASSWORD or not MONGODB_CLUSTER:
@@ -86,6 +89,7 @@ class AudioGenerationRequest(BaseModel):
     script: str
     voice_id: Optional[str] = "en_US-amy-low"
     output_filename: Optional[str] = None
+    inline: bool = True  # include base64 audio_data; audio_url is always returned
 
 
 class VoiceSelectionRequest(BaseModel):
@@ -217,99 +221,121 @@ async def regenerate_script_with_comments(request: RegenerateScriptRequest):
         )
 
 
+GALLERY_DATA_FILE = "sample_data.jsonl"
+YEAR_RE = re.compile(r"\b(\d{4})\b")
+
+# Parsed gallery items, reused until the data file changes on disk
+_gallery_cache = {"mtime": None, "items": None}
+
+
+def _load_gallery_items() -> list:
+    """Parse the sample data into gallery items, memoized on the file's mtime."""
+    mtime = os.stat(GALLERY_DATA_FILE).st_mtime_ns
+    if _gallery_cache["mtime"] == mtime:
+        return _gallery_cache["items"]
+
+    gallery_items = []
+    with open(GALLERY_DATA_FILE, "r", encoding="utf-8") as f:
+        content = f.read().strip()
+    # Check if it's a JSON array or JSONL format
+    if content.startswith("["):
+        # It's a JSON array
+        data = json.loads(content)
+    else:
+        # It's JSONL format - parse the content we already read
+        data = []
+        for line in content.splitlines():
+            if line.strip():
+                data.append(json.loads(line))
+
+    for i, item in enumerate(data):
+        # Handle both old and new field names for backward compatibility
+        title = item.get("Title", item.get("title", "No Title"))
+        creator = item.get("Creator", item.get("creator", "Unknown"))
+        date = item.get("Date", item.get("date", "Unknown"))
+        description = item.get(
+            "Description", item.get("description", "No description")
+        )
+        call_number = item.get("Call number", item.get("call_number", "N/A"))
+
+        # Clean up date field (remove trailing dashes and extra text)
+        if date and isinstance(date, str):
+            date = date.replace("-", "").replace(
+                "date of publication not identified", "Unknown"
+            )
+            # Extract year from date strings like "1938-" or "1936"
+            year_match = YEAR_RE.search(date)
+            if year_match:
+                date = year_match.group(1)
+
+        gallery_items.append(
+            {
+                "id": i,
+                "title": title,
+                "creator": creator,
+                "date": date,
+                "description": description,
+                "call_number": call_number,
+            }
+        )
+
+    _gallery_cache.update(mtime=mtime, items=gallery_items)
+    return gallery_items
+
+
 @app.get("/gallery")
 async def get_gallery():
     """Get available items from the sample data for the gallery."""
     try:
-        gallery_items = []
-        with open("sample_data.jsonl", "r", encoding="utf-8") as f:
-            content = f.read().strip()
-            # Check if it's a JSON array or JSONL format
-            if content.startswith("["):
-                # It's a JSON array
-                data = json.loads(content)
-            else:
-                # It's JSONL format - load line by line
-                f.seek(0)
-                data = []
-                for line in f:
-                    if line.strip():
-                        data.append(json.loads(line.strip()))
-
-            for i, item in enumerate(data):
-                # Handle both old and new field names for backward compatibility
-                title = item.get("Title", item.get("title", "No Title"))
-                creator = item.get("Creator", item.get("creator", "Unknown"))
-                date = item.get("Date", item.get("date", "Unknown"))
-                description = item.get(
-                    "Description", item.get("description", "No description")
-                )
-                call_number = item.get("Call number", item.get("call_number", "N/A"))
-
-                # Clean up date field (remove trailing dashes and extra text)
-                if date and isinstance(date, str):
-                    date = date.replace("-", "").replace(
-                        "date of publication not identified", "Unknown"
-                    )
-                    # Extract year from date strings like "1938-" or "1936"
-                    year_match = re.search(r"\b(\d{4})\b", date)
-                    if year_match:
-                        date = year_match.group(1)
-
-                gallery_items.append(
-                    {
-                        "id": i,
-                        "title": title,
-                        "creator": creator,
-                        "date": date,
-                        "description": description,
-                        "call_number": call_number,
-                    }
-                )
-        return {"items": gallery_items}
+        return {"items": _load_gallery_items()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load gallery: {str(e)}")
 
 
-@app.post("/generate-script")
-async def generate_script(request: MetadataRequest):
-    """Generate a video script from metadata."""
-    try:
-        factual_summary = None
-        if request.artifact_type == "publication_deep_dive":
-            factual_summary = script_generator._generate_factual_summary(
-                request.metadata
-            )
-
-        prompt = script_generator._create_prompt(
-            request.metadata, request.artifact_type, factual_summary
+def _generate_script_result(request: MetadataRequest) -> dict:
+    """Run the blocking generation pipeline (script, QC, translation) for one item."""
+    factual_summary = None
+    if request.artifact_type == "publication_deep_dive":
+        factual_summary = script_generator._generate_factual_summary(
+            request.metadata
         )
 
-        raw_script = script_generator._send_prompt_to_ollama(prompt)
+    prompt = script_generator._create_prompt(
+        request.metadata, request.artifact_type, factual_summary
+    )
 
-        # --- ✨ USE THE NEW, CENTRALIZED CLEANING METHOD ---
-        script = script_generator._clean_raw_script(raw_script)
+    raw_script = script_generator._send_prompt_to_ollama(prompt)
 
-        qc_passed, qc_message = script_generator._quality_check(script)
+    # --- ✨ USE THE NEW, CENTRALIZED CLEANING METHOD ---
+    script = script_generator._clean_raw_script(raw_script)
 
-        result = {
-            "english_script": script,
-            "qc_passed": qc_passed,
-            "qc_message": qc_message,
-            "arabic_translation_refined": None,
-        }
+    qc_passed, qc_message = script_generator._quality_check(script)
 
-        if qc_passed:
-            try:
-                arabic_translation = script_generator.translate_to_arabic(script)
-                refined_arabic = script_generator.refine_translation_with_ollama(
-                    arabic_translation
-                )
-                result["arabic_translation_refined"] = refined_arabic
-            except Exception as e:
-                result["arabic_translation_refined"] = f"Translation failed: {str(e)}"
+    result = {
+        "english_script": script,
+        "qc_passed": qc_passed,
+        "qc_message": qc_message,
+        "arabic_translation_refined": None,
+    }
+
+    if qc_passed:
+        try:
+            arabic_translation = script_generator.translate_to_arabic(script)
+            refined_arabic = script_generator.refine_translation_with_ollama(
+                arabic_translation
+            )
+            result["arabic_translation_refined"] = refined_arabic
+        except Exception as e:
+            result["arabic_translation_refined"] = f"Translation failed: {str(e)}"
+
+    return result
 
-        return result
+
+@app.post("/generate-script")
+async def generate_script(request: MetadataRequest):
+    """Generate a video script from metadata."""
+    try:
+        return await run_in_threadpool(_generate_script_result, request)
 
     except Exception as e:
         raise HTTPException(
@@ -320,57 +346,20 @@ async def generate_script(request: MetadataRequest):
 @app.post("/generate-batch-scripts")
 async def generate_batch_scripts(requests: list[MetadataRequest]):
     """Generate multiple video scripts from a list of metadata."""
-    results = []
+    # Items are independent and spend most of their time waiting on Ollama,
+    # so run a bounded number of them at once off the event loop.
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
 
-    for request in requests:
-        try:
-            factual_summary = None
-            if request.artifact_type == "publication_deep_dive":
-                factual_summary = script_generator._generate_factual_summary(
-                    request.metadata
-                )
-
-            prompt = script_generator._create_prompt(
-                request.metadata, request.artifact_type, factual_summary
-            )
-
-            raw_script = script_generator._send_prompt_to_ollama(prompt)
-
-            # --- ✨ USE THE NEW, CENTRALIZED CLEANING METHOD ---
-            script = script_generator._clean_raw_script(raw_script)
-
-            qc_passed, qc_message = script_generator._quality_check(script)
-
-            result = {
-                "english_script": script,
-                "qc_passed": qc_passed,
-                "qc_message": qc_message,
-                "arabic_translation_refined": None,
-            }
-
-            if qc_passed:
-                try:
-                    arabic_translation = script_generator.translate_to_arabic(script)
-                    refined_arabic = script_generator.refine_translation_with_ollama(
-                        arabic_translation
-                    )
-                    result["arabic_translation_refined"] = refined_arabic
-                except Exception as e:
-                    result["arabic_translation_refined"] = (
-                        f"Translation failed: {str(e)}"
-                    )
-
-            results.append({"metadata": request.metadata, "result": result})
-
-        except Exception as e:
-            results.append(
-                {
-                    "metadata": request.metadata,
-                    "result": {"error": f"Script generation failed: {str(e)}"},
-                }
-            )
+    async def process(request: MetadataRequest) -> dict:
+        async with semaphore:
+            try:
+                result = await run_in_threadpool(_generate_script_result, request)
+            except Exception as e:
+                result = {"error": f"Script generation failed: {str(e)}"}
+        return {"metadata": request.metadata, "result": result}
 
-    return {"results": results}
+    results = await asyncio.gather(*(process(request) for request in requests))
+    return {"results": list(results)}
 
 
 @app.get("/gallery/books/{id}")
@@ -404,7 +393,7 @@ async def get_available_voices():
 async def set_voice(request: VoiceSelectionRequest):
     """Set the current TTS voice."""
     try:
-        tts_service.set_voice(request.voice_id)
+        await run_in_threadpool(tts_service.set_voice, request.voice_id)
         return {
             "success": True,
             "message": f"Voice set to: {request.voice_id}",
@@ -421,9 +410,12 @@ async def set_voice(request: VoiceSelectionRequest):
 async def generate_audio(request: AudioGenerationRequest):
     """Generate audio from script text."""
     try:
-        result = tts_service.generate_script_audio(
+        # Synthesis (and any model download) blocks; keep it off the event loop
+        result = await run_in_threadpool(
+            tts_service.generate_script_audio,
             script=request.script,
-            voice_id=request.voice_id
+            voice_id=request.voice_id,
+            inline=request.inline
         )
         
         if result["success"]:
@@ -445,7 +437,7 @@ async def save_audio_for_download(request: dict):
     """Save audio data to temporary file for download."""
     try:
         audio_data = request.get("audio_data")
-        filename = request.get("filename", f"script_audio_{int(time.time())}.wav")
+        filename = request.get("filename")
         
         if not audio_data:
             raise HTTPException(
@@ -457,13 +449,13 @@ async def save_audio_for_download(request: dict):
         import base64
         audio_bytes = base64.b64decode(audio_data)
         
-        # Save to temporary file
+        # Save to temporary file (named after the audio content if no filename is given)
         file_path = tts_service.save_audio_to_file(audio_bytes, filename)
         
         return {
             "success": True,
             "file_path": file_path,
-            "filename": filename
+            "filename": os.path.basename(file_path)
         }
         
     except Exception as e:
@@ -478,11 +470,16 @@ async def download_audio(filename: str):
     """Download generated audio file."""
     try:
         file_path = f"temp_audio/{filename}"
-        if not os.path.exists(file_path):
-            raise HTTPException(
-                status_code=404,
-                detail="Audio file not found"
-            )
+        # Refresh the file's age so the cleanup thread keeps it while it is
+        # served; if cleanup already removed it, restore it from the audio cache
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            if not await run_in_threadpool(tts_service.restore_audio_file, filename):
+                raise HTTPException(
+                    status_code=404,
+                    detail="Audio file not found"
+                )
         
         # Determine media type based on file extension
         if filename.lower().endswith('.mp3'):
@@ -510,44 +507,16 @@ async def download_audio(filename: str):
 async def generate_script_with_audio(request: MetadataRequest):
     """Generate a video script with audio from metadata."""
     try:
-        # Generate script first
-        factual_summary = None
-        if request.artifact_type == "publication_deep_dive":
-            factual_summary = script_generator._generate_factual_summary(
-                request.metadata
-            )
-
-        prompt = script_generator._create_prompt(
-            request.metadata, request.artifact_type, factual_summary
-        )
-
-        raw_script = script_generator._send_prompt_to_ollama(prompt)
-        script = script_generator._clean_raw_script(raw_script)
-        qc_passed, qc_message = script_generator._quality_check(script)
-
-        result = {
-            "english_script": script,
-            "qc_passed": qc_passed,
-            "qc_message": qc_message,
-            "arabic_translation_refined": None,
-            "audio_generated": False,
-            "audio_info": None
-        }
-
-        # Generate Arabic translation if QC passed
-        if qc_passed:
-            try:
-                arabic_translation = script_generator.translate_to_arabic(script)
-                refined_arabic = script_generator.refine_translation_with_ollama(
-                    arabic_translation
-                )
-                result["arabic_translation_refined"] = refined_arabic
-            except Exception as e:
-                result["arabic_translation_refined"] = f"Translation failed: {str(e)}"
+        # Generate script first, off the event loop
+        result = await run_in_threadpool(_generate_script_result, request)
+        result["audio_generated"] = False
+        result["audio_info"] = None
 
         # Generate audio for the script
         try:
-            audio_result = tts_service.generate_script_audio(script=script)
+            audio_result = await run_in_threadpool(
+                tts_service.generate_script_audio, script=result["english_script"]
+            )
             if audio_result["success"]:
                 result["audio_generated"] = True
                 result["audio_info"] = audio_result
@@ -1,27 +1,113 @@
 import os
+import re
 import json
-import tempfile
-import subprocess
 import requests
-import base64
-import io
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import collections
+import itertools
+import shutil
+import struct
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import logging
 from pydub import AudioSegment
 import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optional JIT for the float -> int16 sample conversion; NumPy ufuncs are used without it
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True)
+    def _float_to_int16_kernel(samples):
+        """Scale, saturate and round float samples to int16 in a single pass."""
+        out = np.empty(samples.shape[0], dtype=np.int16)
+        for i in range(samples.shape[0]):
+            value = samples[i] * 32767.0
+            if value > 32767.0:
+                value = 32767.0
+            elif value < -32767.0:
+                value = -32767.0
+            out[i] = np.int16(round(value))
+        return out
+
+# Optional SIMD base64 encoder (same API as the standard library's)
+try:
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+# Abbreviations expanded for better pronunciation
+ABBREVIATIONS = {
+    "Dr.": "Doctor",
+    "Mr.": "Mister",
+    "Mrs.": "Missus",
+    "Ms.": "Miss",
+    "Prof.": "Professor",
+    "vs.": "versus",
+    "etc.": "et cetera",
+    "i.e.": "that is",
+    "e.g.": "for example",
+    "A.D.": "A D",
+    "B.C.": "B C",
+    "U.S.": "U S",
+    "U.K.": "U K"
+}
+# Longest first so overlapping abbreviations match whole
+ABBREVIATION_RE = re.compile(
+    "|".join(re.escape(abbr) for abbr in sorted(ABBREVIATIONS, key=len, reverse=True))
+)
+
+# Synthesized audio is cached per (voice, script) and kept for a week after last use
+AUDIO_CACHE_MAX_AGE_MINUTES = 7 * 24 * 60
+
+# How often the background thread sweeps old audio files
+CLEANUP_INTERVAL_SECONDS = 5 * 60
+
+# Download integrity: `bytes a-b/<total>` and Hugging Face's LFS SHA-256 ETag
+CONTENT_RANGE_TOTAL_RE = re.compile(r'/(\d+)\s*$')
+LFS_ETAG_RE = re.compile(r'(?:W/)?"?([0-9a-f]{64})"?')
+
+# Served script audio is named after its cache entry
+SCRIPT_AUDIO_NAME_RE = re.compile(r'script_audio_([0-9a-f]{32})\.wav')
+
+# Sentence boundaries used to split scripts for parallel synthesis
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# ONNX Runtime execution providers for voice inference, in order of preference.
+# oneDNN and OpenVINO use AVX-512/VNNI kernels (notably for int8) when present.
+PREFERRED_PROVIDERS = ("DnnlExecutionProvider", "OpenVINOExecutionProvider", "CPUExecutionProvider")
+
+# Drop straight and curly double quotes, straighten curly apostrophes
+QUOTE_TRANSLATION = str.maketrans({
+    '"': None,
+    "\u201c": None,
+    "\u201d": None,
+    "\u2018": "'",
+    "\u2019": "'",
+})
+
 class TTSService:
     """
     Text-to-Speech service using Piper TTS for generating natural-sounding audio
     optimized for Instagram videos and low-spec PCs.
     """
     
+    # Only one background cleanup thread per process
+    _cleanup_started = False
+    
     def __init__(self, models_dir: str = "tts_models"):
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(exist_ok=True)
@@ -56,7 +142,49 @@ class TTSService:
         }
         
         self.current_model = "en_US-amy-low"
+        
+        # (model file mtime, loaded PiperVoice) per model key; loading parses the ONNX graph
+        self._voices = {}
+        self._voice_lock = threading.Lock()
+        
+        # Keys of models present in models_dir, filled by one directory scan
+        self._downloaded_models = None
+        self._models_dir_mtime = None
+        self._voice_list_cache: Optional[List[Dict]] = None
+        
+        # Per-model locks: requests run in a thread pool, and concurrent downloads
+        # or quantizations of one model would write the same .part files
+        self._model_locks: Dict[str, threading.RLock] = {}
+        
+        # Models whose files matched their checksums in this process
+        self._verified_models = set()
+        
+        # Models that could not be quantized; they run FP32 without retrying
+        self._quantize_failed = set()
+        
+        # Sentences are synthesized in parallel; ONNX Runtime releases the GIL.
+        # Each session keeps ORT's default intra-op threads so single runs use
+        # every core, which leaves room for only a couple of concurrent runs
+        self.synthesis_workers = min(2, os.cpu_count() or 1)
+        self._synthesis_pool = ThreadPoolExecutor(
+            max_workers=self.synthesis_workers, thread_name_prefix="tts-synthesis"
+        )
+        
+        # One pooled session for model downloads, retrying transient failures
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                raise_on_status=False,
+            ),
+        ))
+        
         self._ensure_piper_installed()
+        self._start_cleanup_thread()
         
     def _ensure_piper_installed(self):
         """Ensure Piper TTS is installed and accessible."""
@@ -67,38 +195,53 @@ class TTSService:
             logger.warning("Piper TTS Python package not found. Please install it manually.")
             logger.info("Installation: pip install piper-tts")
     
+    def _model_lock(self, model_key: str) -> threading.RLock:
+        """The lock serializing downloads and quantization of one model."""
+        return self._model_locks.setdefault(model_key, threading.RLock())
+    
     def download_model(self, model_key: str) -> bool:
         """Download a voice model if not already present."""
         if model_key not in self.voice_models:
             raise ValueError(f"Unknown model: {model_key}")
-            
+        
+        # A second caller waits, then finds the files the first one fetched
+        with self._model_lock(model_key):
+            return self._download_model(model_key)
+    
+    def _download_model(self, model_key: str) -> bool:
+        """download_model, with the model's lock held."""
         model_info = self.voice_models[model_key]
         model_path = self.models_dir / f"{model_key}.onnx"
         config_path = self.models_dir / f"{model_key}.onnx.json"
         
-        # Check if model already exists
+        # Check if model already exists (checksums are verified once per process)
         if model_path.exists() and config_path.exists():
-            logger.info(f"Model {model_key} already exists")
-            return True
+            if model_key in self._verified_models or (
+                self._verify_download(model_path, model_info["url"])
+                and self._verify_download(config_path, model_info["config_url"])
+            ):
+                logger.info(f"Model {model_key} already exists")
+                self._verified_models.add(model_key)
+                self._mark_downloaded(model_key)
+                return True
+            logger.warning(f"Model {model_key} could not be verified, downloading it again")
             
         try:
             logger.info(f"Downloading model: {model_key}")
             
-            # Download model file
-            response = requests.get(model_info["url"], stream=True)
-            response.raise_for_status()
-            with open(model_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
-            # Download config file
-            response = requests.get(model_info["config_url"], stream=True)
-            response.raise_for_status()
-            with open(config_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # Download model and config files concurrently; any failure is re-raised here
+            downloads = [(model_info["url"], model_path), (model_info["config_url"], config_path)]
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(lambda download: self._download_file(*download), downloads))
                     
             logger.info(f"Successfully downloaded model: {model_key}")
+            self._verified_models.add(model_key)
+            self._mark_downloaded(model_key)
+            
+            # Prepare the int8 copy now rather than on the first synthesis request
+            if self._quantize_enabled():
+                self._quantize_failed.discard(model_key)  # Fresh model files get a fresh attempt
+                self._quantized_model_path(model_key, model_path)
             return True
             
         except requests.exceptions.HTTPError as e:
@@ -108,24 +251,188 @@ class TTSService:
                 logger.error(f"Model {model_key} not found. The model may have been removed or the URL is incorrect.")
             else:
                 logger.error(f"HTTP error downloading model {model_key}: {str(e)}")
-            return False
         except Exception as e:
             logger.error(f"Failed to download model {model_key}: {str(e)}")
+        
+        # Offline or rate-limited: keep working with the files already on disk
+        # (downloads only replace them once complete)
+        if model_path.exists() and config_path.exists():
+            logger.warning(f"Using the existing files for model {model_key}")
+            self._mark_downloaded(model_key)
+            return True
+        return False
+    
+    def _download_file(self, url: str, path: Path):
+        """
+        Stream a file to `path`, resuming an earlier partial download.
+        
+        Data goes to `<path>.part` and is renamed into place only once its size
+        matches the total the server advertised (and its SHA-256 matches the
+        Hugging Face LFS ETag, when there is one), so an interrupted or spliced
+        download never looks finished. Resumes send If-Range with the ETag the
+        partial was started from, so a file that changed on the server is
+        downloaded from scratch. A `<path>.blake2b` sidecar records the checksum
+        of the verified file.
+        """
+        partial_path = path.with_name(path.name + ".part")
+        validator_path = path.with_name(path.name + ".part.etag")
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        validator = validator_path.read_text().strip() if offset and validator_path.exists() else ""
+        if not validator:
+            # Nothing ties the partial to the current remote file; start over
+            offset = 0
+        
+        # Identity encoding keeps byte ranges and Content-Length in file bytes
+        headers = {"Accept-Encoding": "identity"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+        
+        with self._http.get(url, stream=True, headers=headers, timeout=30) as response:
+            if offset and response.status_code == 416:
+                # The partial holds everything only if it is exactly the remote size
+                expected_size = self._content_range_total(response)
+                if expected_size != offset:
+                    logger.warning(f"Partial download of {path.name} does not match the remote file, restarting")
+                    partial_path.unlink()
+                    validator_path.unlink(missing_ok=True)
+                    return self._download_file(url, path)
+            else:
+                response.raise_for_status()
+                if response.status_code == 206:
+                    expected_size = self._content_range_total(response)
+                else:
+                    # Server ignored the range request, or the file changed; start over
+                    offset = 0
+                    content_length = response.headers.get("Content-Length")
+                    expected_size = int(content_length) if content_length else None
+                    # Remember what this download started from so a resume can send If-Range
+                    validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                    if validator and not validator.startswith("W/"):
+                        validator_path.write_text(validator)
+                    else:
+                        validator_path.unlink(missing_ok=True)
+                # Copy the raw stream in 1 MiB blocks
+                with open(partial_path, 'ab' if offset else 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 20)
+            
+            # Hugging Face puts the LFS size and SHA-256 on the redirect to its CDN
+            linked_size = self._linked_header(response, "X-Linked-Size")
+            linked_etag = LFS_ETAG_RE.fullmatch(self._linked_header(response, "X-Linked-Etag") or "")
+        
+        if expected_size is None and linked_size:
+            expected_size = int(linked_size)
+        size = partial_path.stat().st_size
+        if expected_size is not None and size != expected_size:
+            if size > expected_size:
+                partial_path.unlink()
+                validator_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Incomplete download of {path.name}: got {size} of {expected_size} bytes")
+        
+        if linked_etag and self._file_digest(partial_path, "sha256") != linked_etag.group(1):
+            partial_path.unlink()
+            validator_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Download of {path.name} failed its SHA-256 check")
+        
+        digest = self._file_digest(partial_path)
+        os.replace(partial_path, path)
+        validator_path.unlink(missing_ok=True)
+        path.with_name(path.name + ".blake2b").write_text(digest)
+    
+    def _content_range_total(self, response) -> Optional[int]:
+        """Total size from a `Content-Range: bytes .../<total>` header, if the server sent one."""
+        match = CONTENT_RANGE_TOTAL_RE.search(response.headers.get("Content-Range", ""))
+        return int(match.group(1)) if match else None
+    
+    def _linked_header(self, response, name: str) -> Optional[str]:
+        """A header from the response or any redirect that led to it."""
+        for hop in (response, *response.history):
+            if name in hop.headers:
+                return hop.headers[name]
+        return None
+    
+    def _verify_download(self, path: Path, url: str) -> bool:
+        """
+        Check a downloaded file against its checksum sidecar.
+        
+        Files downloaded before sidecars were written are checked against the
+        remote size when the server reports one, and adopted (sidecar written)
+        unless the size is actually wrong.
+        """
+        checksum_path = path.with_name(path.name + ".blake2b")
+        if checksum_path.exists():
+            return self._file_digest(path) == checksum_path.read_text().strip()
+        
+        remote_size = self._remote_size(url)
+        if remote_size is not None and path.stat().st_size != remote_size:
+            logger.warning(f"{path.name} is {path.stat().st_size} bytes, expected {remote_size}")
             return False
+        checksum_path.write_text(self._file_digest(path))
+        return True
+    
+    def _remote_size(self, url: str) -> Optional[int]:
+        """Size of a remote file from a HEAD request, or None if unavailable (e.g. offline)."""
+        try:
+            response = self._http.head(
+                url, allow_redirects=True, headers={"Accept-Encoding": "identity"}, timeout=10
+            )
+        except requests.exceptions.RequestException:
+            return None
+        # Hugging Face reports LFS sizes on the redirect to its CDN
+        size = self._linked_header(response, "X-Linked-Size")
+        if size is None and response.status_code == 200:
+            size = response.headers.get("Content-Length")
+        return int(size) if size else None
+    
+    def _file_digest(self, path: Path, algorithm: str = "blake2b") -> str:
+        """Hex digest of a file, read in 1 MiB blocks."""
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _get_downloaded_models(self) -> set:
+        """Return the keys of models present on disk, rescanning only when models_dir changes."""
+        mtime = self.models_dir.stat().st_mtime_ns
+        if self._downloaded_models is None or mtime != self._models_dir_mtime:
+            self._models_dir_mtime = mtime
+            self._voice_list_cache = None
+            with os.scandir(self.models_dir) as entries:
+                self._downloaded_models = {
+                    entry.name[:-len(".onnx")]
+                    for entry in entries
+                    if entry.name.endswith(".onnx") and entry.is_file()
+                }
+        return self._downloaded_models
+    
+    def _mark_downloaded(self, model_key: str):
+        """Record a model as present without rescanning models_dir."""
+        if self._downloaded_models is not None:
+            self._downloaded_models.add(model_key)
+        self._voice_list_cache = None
     
     def get_available_voices(self) -> List[Dict]:
-        """Get list of available voice models with their properties."""
+        """
+        Get list of available voice models with their properties.
+        
+        The list is cached and shared between callers, so treat it as read-only.
+        """
+        downloaded = self._get_downloaded_models()
+        if self._voice_list_cache is not None:
+            return self._voice_list_cache
+        
         voices = []
         for key, info in self.voice_models.items():
-            model_path = self.models_dir / f"{key}.onnx"
             voices.append({
                 "id": key,
                 "name": info["name"],
                 "language": info["language"],
                 "gender": info["gender"],
                 "style": info["style"],
-                "downloaded": model_path.exists()
+                "downloaded": key in downloaded
             })
+        self._voice_list_cache = voices
         return voices
     
     def set_voice(self, voice_id: str):
@@ -146,27 +453,10 @@ class TTSService:
         text = " ".join(text.split())
         
         # Handle common abbreviations for better pronunciation
-        abbreviations = {
-            "Dr.": "Doctor",
-            "Mr.": "Mister", 
-            "Mrs.": "Missus",
-            "Ms.": "Miss",
-            "Prof.": "Professor",
-            "vs.": "versus",
-            "etc.": "et cetera",
-            "i.e.": "that is",
-            "e.g.": "for example",
-            "A.D.": "A D",
-            "B.C.": "B C",
-            "U.S.": "U S",
-            "U.K.": "U K"
-        }
-        
-        for abbr, full in abbreviations.items():
-            text = text.replace(abbr, full)
+        text = ABBREVIATION_RE.sub(lambda match: ABBREVIATIONS[match.group(0)], text)
         
         # Remove special characters that might cause issues
-        text = text.replace('"', '').replace('"', '').replace(''', "'").replace(''', "'")
+        text = text.translate(QUOTE_TRANSLATION)
         
         return text
     
@@ -192,6 +482,116 @@ class TTSService:
             logger.warning(f"Audio optimization failed: {str(e)}. Using original audio.")
             return audio
     
+    def _get_voice(self, model_key: str):
+        """Return the PiperVoice for a model, reloading it only if the model file changed."""
+        mtime = (self.models_dir / f"{model_key}.onnx").stat().st_mtime_ns
+        with self._voice_lock:
+            cached = self._voices.get(model_key)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            logger.info(f"Loading voice model: {model_key}")
+            voice = self._load_voice(model_key)
+            self._voices[model_key] = (mtime, voice)
+            return voice
+    
+    def _load_voice(self, model_key: str):
+        """
+        Build a PiperVoice with our own ONNX Runtime session.
+        
+        Uses the oneDNN or OpenVINO execution provider when the installed
+        onnxruntime has one, and an int8 copy of the model when TTS_QUANTIZE=true.
+        """
+        import onnxruntime
+        from piper import PiperVoice
+        from piper.config import PiperConfig
+        
+        model_path = self.models_dir / f"{model_key}.onnx"
+        config_path = self.models_dir / f"{model_key}.onnx.json"
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = PiperConfig.from_dict(json.load(f))
+        
+        if self._quantize_enabled():
+            model_path = self._quantized_model_path(model_key, model_path)
+        
+        available = set(onnxruntime.get_available_providers())
+        providers = [provider for provider in PREFERRED_PROVIDERS if provider in available]
+        
+        sess_options = onnxruntime.SessionOptions()
+        # Fuse and constant-fold the graph once at load time
+        sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Intra-op threads stay at ORT's default (all cores) for single-sentence
+        # runs; they don't spin-wait, so parallel sentence workers share cores
+        # instead of burning them. The VITS graph is a single chain, so
+        # inter-op parallelism has nothing to overlap
+        sess_options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+        sess_options.inter_op_num_threads = 1
+        sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        sess_options.enable_cpu_mem_arena = True
+        
+        session = onnxruntime.InferenceSession(str(model_path), sess_options=sess_options, providers=providers)
+        logger.info(f"Voice {model_key} running on {session.get_providers()[0]}")
+        return PiperVoice(session=session, config=config)
+    
+    def _quantize_enabled(self) -> bool:
+        """Whether voices should run from int8-quantized models (TTS_QUANTIZE=true)."""
+        return os.getenv("TTS_QUANTIZE", "false").lower() == "true"
+    
+    def _quantized_model_path(self, model_key: str, model_path: Path) -> Path:
+        """Return the int8 model to run, or `model_path` if the model cannot be quantized."""
+        with self._model_lock(model_key):
+            if model_key in self._quantize_failed:
+                return model_path
+            try:
+                return self._quantize_model(model_path)
+            except Exception as e:
+                self._quantize_failed.add(model_key)
+                logger.warning(f"Could not quantize model {model_key}: {str(e)}. Using FP32 model.")
+                return model_path
+    
+    def _quantize_model(self, model_path: Path) -> Path:
+        """Return the path of an int8 copy of the model, creating it if missing or stale."""
+        quantized_path = model_path.with_name(f"{model_path.stem}.int8.onnx")
+        if (not quantized_path.exists()
+                or quantized_path.stat().st_mtime_ns < model_path.stat().st_mtime_ns):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            
+            logger.info(f"Quantizing {model_path.name} to int8 (one-time)")
+            partial_path = quantized_path.with_name(quantized_path.name + ".part")
+            try:
+                quantize_dynamic(str(model_path), str(partial_path), weight_type=QuantType.QInt8)
+                os.replace(partial_path, quantized_path)
+            finally:
+                partial_path.unlink(missing_ok=True)
+        return quantized_path
+    
+    def _float_to_int16(self, samples: np.ndarray) -> np.ndarray:
+        """Convert float samples in [-1, 1] to int16, saturating out-of-range values."""
+        if NUMBA_AVAILABLE:
+            # One fused pass instead of clip, multiply, rint and cast
+            return _float_to_int16_kernel(samples.reshape(-1))
+        
+        # clip allocates the one float scratch array; scale and round it in place
+        scaled = np.clip(samples, -1.0, 1.0)
+        np.multiply(scaled, 32767, out=scaled)
+        np.rint(scaled, out=scaled)
+        return scaled.astype(np.int16, copy=False)
+    
+    def _chunk_to_int16(self, chunk) -> np.ndarray:
+        """Return an AudioChunk's samples as an int16 array."""
+        float_samples = getattr(chunk, "audio_float_array", None)
+        if float_samples is not None:
+            return self._float_to_int16(float_samples)
+        return np.frombuffer(chunk.audio_int16_bytes, dtype=np.int16)
+    
+    def _wav_header(self, data_size: int, sample_rate: int) -> bytes:
+        """44-byte RIFF/WAVE header for mono 16-bit PCM with `data_size` bytes of samples."""
+        return struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,  # PCM, mono, 16-bit
+            b'data', data_size,
+        )
+    
     def generate_audio(self, text: str, speed: float = 1.0, volume: float = 1.0) -> bytes:
         """
         Generate audio from text and return as bytes.
@@ -204,69 +604,20 @@ class TTSService:
         Returns:
             Audio data as bytes
         """
-        if not text.strip():
-            raise ValueError("Text cannot be empty")
-        
-        # Clean text for TTS
-        cleaned_text = self._clean_text_for_tts(text)
-        
-        # Ensure model is downloaded
-        if not self.download_model(self.current_model):
-            raise RuntimeError(f"Failed to download voice model: {self.current_model}")
+        voice, cleaned_text = self._prepare_synthesis(text, self.current_model)
         
         try:
-            # Import piper
-            import piper
-            
-            # Build model path
-            model_path = self.models_dir / f"{self.current_model}.onnx"
-            
-            # Initialize Piper TTS
-            logger.info(f"Generating audio with voice: {self.current_model}")
-            
-            # Create Piper voice
-            voice = piper.PiperVoice.load(str(model_path))
-            
-            # Generate audio - handle both generator and bytes output
-            audio_data = voice.synthesize(cleaned_text)
-            
-            # Collect all audio data first
-            all_audio_data = []
             sample_rate = 16000  # Default sample rate
+            pcm_chunks = []
+            for sample_rate, pcm in self._synthesize_pcm(voice, cleaned_text):
+                pcm_chunks.append(pcm)
             
-            if hasattr(audio_data, '__iter__') and not isinstance(audio_data, bytes):
-                # If it's a generator, collect AudioChunk objects
-                for chunk in audio_data:
-                    sample_rate = chunk.sample_rate  # Get actual sample rate
-                    if chunk.audio_int16_bytes is None:
-                        # Convert float array to int16
-                        audio_int16 = (chunk.audio_float_array * 32767).astype(np.int16)
-                        all_audio_data.append(audio_int16.tobytes())
-                    else:
-                        all_audio_data.append(chunk.audio_int16_bytes)
-                
-                # Combine all audio data
-                combined_audio = b''.join(all_audio_data)
-            else:
-                # If it's bytes, use directly
-                combined_audio = audio_data
-            
-            # Create WAV file in memory
-            import wave
-            
-            # Create a BytesIO buffer to hold the WAV data
-            wav_buffer = io.BytesIO()
-            
-            # Write WAV file with proper header
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(combined_audio)
+            # Combine all audio data in a single copy
+            combined_audio = np.concatenate(pcm_chunks) if pcm_chunks else np.zeros(0, dtype=np.int16)
             
-            # Get the bytes from the buffer
-            wav_bytes = wav_buffer.getvalue()
-            wav_buffer.close()
+            # Create WAV file in memory: header and samples joined in a single copy
+            header = self._wav_header(combined_audio.nbytes, sample_rate)
+            wav_bytes = b"".join((header, memoryview(combined_audio).cast('B')))
             
             logger.info(f"Audio generated successfully in memory")
             return wav_bytes
@@ -274,65 +625,169 @@ class TTSService:
         except Exception as e:
             raise RuntimeError(f"Audio generation failed: {str(e)}")
     
-    def generate_script_audio(self, script: str, voice_id: str = None) -> Dict:
+    def _synthesize_to_file(self, text: str, path: Path, model_key: str) -> Tuple[int, int]:
+        """
+        Synthesize text straight into a WAV file, one chunk at a time.
+        
+        Samples are appended after a placeholder header that is filled in once
+        the final length is known. Only the sentences in the synthesis window
+        (see `_synthesize_pcm`) are in memory at once, not the whole recording.
+        The file is written under a temporary name and renamed into place.
+        
+        Returns:
+            (sample_rate, num_samples)
+        """
+        voice, cleaned_text = self._prepare_synthesis(text, model_key)
+        partial_path = path.with_name(f"{path.name}.{threading.get_ident()}.part")
+        
+        try:
+            sample_rate = 16000  # Default sample rate
+            data_size = 0
+            with open(partial_path, 'wb') as f:
+                f.write(bytes(44))  # Header placeholder
+                for sample_rate, pcm in self._synthesize_pcm(voice, cleaned_text):
+                    f.write(memoryview(pcm).cast('B'))
+                    data_size += pcm.nbytes
+                
+                f.seek(0)
+                f.write(self._wav_header(data_size, sample_rate))
+            os.replace(partial_path, path)
+            
+            logger.info(f"Audio generated successfully: {path}")
+            return sample_rate, data_size // 2
+            
+        except Exception as e:
+            partial_path.unlink(missing_ok=True)
+            raise RuntimeError(f"Audio generation failed: {str(e)}")
+    
+    def _prepare_synthesis(self, text: str, model_key: str) -> Tuple[object, str]:
+        """Validate and clean text, and return the model's PiperVoice with the cleaned text."""
+        if not text.strip():
+            raise ValueError("Text cannot be empty")
+        
+        # Clean text for TTS
+        cleaned_text = self._clean_text_for_tts(text)
+        
+        # Ensure model is downloaded
+        if not self.download_model(model_key):
+            raise RuntimeError(f"Failed to download voice model: {model_key}")
+        
+        # Initialize Piper TTS
+        logger.info(f"Generating audio with voice: {model_key}")
+        
+        # Reuse the loaded Piper voice
+        return self._get_voice(model_key), cleaned_text
+    
+    def _synthesize_pcm(self, voice, text: str):
+        """Yield (sample_rate, int16 samples) for each synthesized chunk, in script order."""
+        sentences = [sentence for sentence in SENTENCE_SPLIT_RE.split(text) if sentence.strip()]
+        if len(sentences) > 1 and self.synthesis_workers > 1:
+            # Synthesize sentences in parallel, converting to int16 in the workers.
+            # Only a bounded window of sentences is in flight, so finished audio
+            # never piles up far ahead of the consumer
+            def synthesize_sentence(sentence):
+                return [(chunk.sample_rate, self._chunk_to_int16(chunk)) for chunk in voice.synthesize(sentence)]
+            
+            remaining = iter(sentences)
+            pending = collections.deque(
+                self._synthesis_pool.submit(synthesize_sentence, sentence)
+                for sentence in itertools.islice(remaining, 2 * self.synthesis_workers)
+            )
+            while pending:
+                chunks = pending.popleft().result()
+                for sentence in itertools.islice(remaining, 1):
+                    pending.append(self._synthesis_pool.submit(synthesize_sentence, sentence))
+                yield from chunks
+            return
+        
+        # Generate audio - handle both generator and bytes output
+        audio_data = voice.synthesize(text)
+        if isinstance(audio_data, bytes):
+            # If it's bytes, use directly
+            yield 16000, np.frombuffer(audio_data, dtype=np.int16)
+            return
+        
+        for chunk in audio_data:
+            yield chunk.sample_rate, self._chunk_to_int16(chunk)
+    
+    def generate_script_audio(self, script: str, voice_id: str = None, inline: bool = True) -> Dict:
         """
         Generate audio for a complete script with Instagram optimization.
         
         Args:
             script: The script text to convert to audio
             voice_id: Voice model to use (optional)
+            inline: Include the WAV as base64 `audio_data` (the file is always
+                saved and served from `audio_url` as well)
             
         Returns:
             Dictionary with audio data and information
         """
         try:
+            # Resolve the voice once: concurrent requests may change current_model
+            model_key = voice_id or self.current_model
+            
             # Set voice if specified
             if voice_id:
                 self.set_voice(voice_id)
+            elif not self.download_model(model_key):
+                raise RuntimeError(f"Failed to download voice model: {model_key}")
             
-            # Generate audio with Instagram-optimized settings
-            audio_bytes = self.generate_audio(
-                text=script,
-                speed=1.0,  # Normal speed for Instagram
-                volume=1.0  # Normal volume
-            )
+            # Load the voice before keying the cache, so a failed int8 quantization
+            # is known and FP32 audio is not stored under the int8 key
+            self._get_voice(model_key)
             
-            # Convert to base64 for frontend transmission
-            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+            # Served file is named after the cache key, so the same voice and script map to one file
+            cache_path = self._audio_cache_path(script, model_key)
+            temp_dir = Path("temp_audio")
+            temp_dir.mkdir(exist_ok=True)
+            filename = f"script_audio_{cache_path.stem}.wav"
+            file_path = temp_dir / filename
+            
+            # The cleanup thread may remove the served file at any point, so it is
+            # held open while in use; if it is already gone, restore or resynthesize
+            audio_file = self._open_audio_file(file_path)
+            if audio_file is None and self._restore_cached_audio(cache_path, file_path):
+                audio_file = self._open_audio_file(file_path)
+            
+            if audio_file is not None:
+                # Reuse audio already synthesized for this voice and script
+                logger.info(f"Using cached audio: {filename}")
+                # Our files carry a fixed 44-byte header
+                sample_rate, = struct.unpack_from('<I', audio_file.read(44), 24)
+                num_samples = (os.fstat(audio_file.fileno()).st_size - 44) // 2
+            else:
+                # Stream synthesis straight to the served file (normal speed and volume for Instagram)
+                sample_rate, num_samples = self._synthesize_to_file(script, file_path, model_key)
+                self._store_cached_audio(cache_path, file_path)
+                audio_file = open(file_path, 'rb')
             
-            # Calculate duration from audio data
-            import wave
-            import io
+            duration_seconds = num_samples / sample_rate
             
-            wav_buffer = io.BytesIO(audio_bytes)
-            duration_seconds = 0.0
+            with audio_file:
+                file_size = os.fstat(audio_file.fileno()).st_size
+                if inline:
+                    # Convert to base64 for frontend transmission; only inline responses load the audio
+                    audio_file.seek(0)
+                    audio_data = b64encode(audio_file.read()).decode('ascii')
             
-            try:
-                # Calculate duration from WAV data
-                with wave.open(wav_buffer, 'rb') as wav_file:
-                    frames = wav_file.getnframes()
-                    sample_rate = wav_file.getframerate()
-                    duration_seconds = frames / sample_rate
-            except Exception as e:
-                logger.warning(f"Could not calculate duration: {str(e)}")
-                # Fallback: estimate duration based on script length
-                duration_seconds = len(script.split()) / 2.5  # Rough estimate: 2.5 words per second
-            finally:
-                wav_buffer.close()
-            
-            file_size = len(audio_bytes)
-            
-            return {
+            result = {
                 "success": True,
-                "audio_data": audio_base64,
-                "audio_bytes": len(audio_bytes),
+                "audio_url": f"/tts/download/{filename}",
+                "filename": filename,
+                "audio_bytes": file_size,
                 "duration_seconds": round(duration_seconds, 2),
-                "voice_used": self.current_model,
-                "voice_name": self.voice_models[self.current_model]["name"],
+                "voice_used": model_key,
+                "voice_name": self.voice_models[model_key]["name"],
                 "file_size_mb": round(file_size / (1024 * 1024), 2),
                 "mime_type": "audio/wav"
             }
             
+            if inline:
+                result["audio_data"] = audio_data
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Script audio generation failed: {str(e)}")
             return {
@@ -340,13 +795,81 @@ class TTSService:
                 "error": str(e)
             }
     
-    def save_audio_to_file(self, audio_bytes: bytes, filename: str) -> str:
+    def _open_audio_file(self, path: Path):
+        """Open a served audio file and refresh its age for cleanup, or return None if it is gone."""
+        try:
+            audio_file = open(path, 'rb')
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                audio_file.close()
+                raise
+        except FileNotFoundError:
+            return None
+        return audio_file
+    
+    def _audio_cache_path(self, script: str, model_key: str) -> Path:
+        """
+        Cache file for a script rendered with a voice model.
+        
+        The key includes the model file's mtime, so re-downloaded or updated
+        models don't serve audio from the old files, and whether it runs int8
+        (call after the voice is loaded, when a failed quantization is known).
+        """
+        model_mtime = (self.models_dir / f"{model_key}.onnx").stat().st_mtime_ns
+        quantized = self._quantize_enabled() and model_key not in self._quantize_failed
+        key = f"{model_key}\0{model_mtime}\0{int(quantized)}\0{script}"
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return self.models_dir / "cache" / f"{digest}.wav"
+    
+    def _store_cached_audio(self, cache_path: Path, audio_path: Path):
+        """Atomically copy synthesized audio into the cache; failures only cost the cache entry."""
+        try:
+            cache_path.parent.mkdir(exist_ok=True)
+            self._copy_file_atomic(audio_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not cache audio: {str(e)}")
+    
+    def _restore_cached_audio(self, cache_path: Path, audio_path: Path) -> bool:
+        """Copy a cache entry to `audio_path` if there is one."""
+        try:
+            self._copy_file_atomic(cache_path, audio_path)
+            os.utime(cache_path)  # Recently used entries survive cleanup
+        except FileNotFoundError:
+            # No entry, or cleanup removed it mid-copy
+            return audio_path.exists()
+        return True
+    
+    def restore_audio_file(self, filename: str) -> bool:
+        """
+        Bring back a served script audio file that cleanup removed, from the cache.
+        
+        Lets clients keep replaying an `audio_url` after the 10-minute temp file is gone.
+        """
+        match = SCRIPT_AUDIO_NAME_RE.fullmatch(filename)
+        if not match:
+            return False
+        cache_path = self.models_dir / "cache" / f"{match.group(1)}.wav"
+        return self._restore_cached_audio(cache_path, Path("temp_audio") / filename)
+    
+    def _copy_file_atomic(self, source: Path, destination: Path):
+        """Copy a file on disk (without reading it into memory) and rename it into place."""
+        partial_path = destination.with_name(f"{destination.name}.{threading.get_ident()}.part")
+        try:
+            shutil.copyfile(source, partial_path)
+            os.replace(partial_path, destination)
+        finally:
+            partial_path.unlink(missing_ok=True)
+    
+    def save_audio_to_file(self, audio_bytes: bytes, filename: Optional[str] = None) -> str:
         """
         Save audio bytes to a temporary file for download.
         
         Args:
             audio_bytes: Audio data as bytes
-            filename: Name for the file
+            filename: Name for the file (optional; defaults to a name derived
+                from the audio content, so saving the same audio twice reuses
+                the existing file)
             
         Returns:
             Path to the saved file
@@ -355,12 +878,20 @@ class TTSService:
         temp_dir = Path("temp_audio")
         temp_dir.mkdir(exist_ok=True)
         
-        # Clean up old files (older than 10 minutes)
-        self._cleanup_old_temp_files()
+        content_addressed = filename is None
+        if content_addressed:
+            digest = hashlib.blake2b(audio_bytes, digest_size=8).hexdigest()
+            filename = f"script_audio_{digest}.wav"
         
         file_path = temp_dir / filename
         
         try:
+            if content_addressed and file_path.exists():
+                # Same content is already on disk; refresh its age for cleanup
+                os.utime(file_path)
+                logger.info(f"Audio already saved: {file_path}")
+                return str(file_path)
+            
             with open(file_path, 'wb') as f:
                 f.write(audio_bytes)
             
@@ -370,22 +901,38 @@ class TTSService:
         except Exception as e:
             raise RuntimeError(f"Failed to save audio file: {str(e)}")
     
-    def _cleanup_old_temp_files(self, max_age_minutes: int = 10):
-        """Clean up temporary audio files older than specified minutes."""
+    def _start_cleanup_thread(self):
+        """Sweep old temporary audio and cache entries in a daemon thread, off the request path."""
+        if TTSService._cleanup_started:
+            return
+        TTSService._cleanup_started = True
+        
+        def cleanup_loop():
+            while True:
+                # Temporary files older than 10 minutes, cache entries unused for a week
+                self._cleanup_old_temp_files()
+                self._cleanup_old_temp_files(AUDIO_CACHE_MAX_AGE_MINUTES, self.models_dir / "cache")
+                time.sleep(CLEANUP_INTERVAL_SECONDS)
+        
+        threading.Thread(target=cleanup_loop, name="tts-cleanup", daemon=True).start()
+    
+    def _cleanup_old_temp_files(self, max_age_minutes: int = 10, temp_dir: Path = Path("temp_audio")):
+        """Clean up audio files in temp_dir older than specified minutes."""
         try:
-            temp_dir = Path("temp_audio")
             if not temp_dir.exists():
                 return
             
             current_time = time.time()
             max_age_seconds = max_age_minutes * 60
             
-            for file_path in temp_dir.glob("*.wav"):
-                if file_path.is_file():
-                    file_age = current_time - file_path.stat().st_mtime
-                    if file_age > max_age_seconds:
-                        file_path.unlink()
-                        logger.info(f"Cleaned up old temporary file: {file_path}")
+            # DirEntry caches the file type and stat from the directory read
+            with os.scandir(temp_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".wav") and entry.is_file(follow_symlinks=False):
+                        file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
+                        if file_age > max_age_seconds:
+                            os.unlink(entry.path)
+                            logger.info(f"Cleaned up old temporary file: {entry.path}")
         except Exception as e:
             logger.warning(f"Failed to cleanup temporary files: {str(e)}")
 